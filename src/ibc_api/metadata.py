@@ -2,6 +2,9 @@
 
 import json
 import os
+import shutil
+import uuid
+from functools import lru_cache
 
 import requests
 
@@ -10,8 +13,20 @@ REMOTE_ROOT = "https://raw.githubusercontent.com/individual-brain-charting/api/m
 LOCAL_ROOT = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(LOCAL_ROOT, exist_ok=True)
 
+# ETags of the fetched remote files, to skip fetching unchanged files
+ETAGS_FILE = os.path.join(LOCAL_ROOT, ".etags.json")
+
 SUBJECTS = [f"{subject:02}" for subject in range(1, 16)]
 
+# one http session for all fetches, to reuse the connection
+_SESSION = requests.Session()
+_SESSION.headers.update(
+    {
+        "Accept": "application/vnd.github.v4.raw",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+)
+
 
 def _load_json(data_file):
     """Read a given json file
@@ -32,6 +47,55 @@ def _load_json(data_file):
     return data
 
 
+def _load_etags(etags_file=ETAGS_FILE):
+    """Read the ETags of the previously fetched remote files
+
+    Parameters
+    ----------
+    etags_file : str, optional
+        path to the json file storing the ETags, by default ETAGS_FILE
+
+    Returns
+    -------
+    dict
+        ETags keyed by url, empty if there is no (valid) etags file
+    """
+    if not os.path.exists(etags_file):
+        return {}
+    try:
+        return _load_json(etags_file)
+    except json.JSONDecodeError:
+        return {}
+
+
+def write_atomically(file, write_func, binary=False):
+    """Write a file through a temporary file moved in place, so that readers
+    never see a partially written file
+
+    Parameters
+    ----------
+    file : str
+        path of the file to write
+    write_func : callable
+        function writing the contents to the open temporary file
+    binary : bool, optional
+        whether to open the temporary file in binary mode, by default False
+    """
+    file_dir, file_name = os.path.split(file)
+    # unique name next to the destination, so parallel writers don't clash
+    # and the move stays on the same filesystem
+    tmp_file = os.path.join(file_dir, f".{file_name}.{uuid.uuid4().hex}")
+    # opening the file normally gives it the usual umask-based permissions
+    f = open(tmp_file, "xb" if binary else "x")
+    try:
+        with f:
+            write_func(f)
+        os.replace(tmp_file, file)
+    except BaseException:
+        os.remove(tmp_file)
+        raise
+
+
 def select_dataset(data_type, metadata=None, version=None):
     """Select metadata of the requested dataset
 
@@ -95,14 +159,7 @@ def _find_latest_version(dataset):
     int
         index of the latest version of the dataset
     """
-    latest_version_index = 0
-    latest_version = 0
-    for i, data in enumerate(dataset):
-        if data["version"] > latest_version:
-            latest_version = data["version"]
-            latest_version_index = i
-
-    return latest_version_index
+    return max(range(len(dataset)), key=lambda i: dataset[i]["version"])
 
 
 def fetch_remote_file(file, remote_root=REMOTE_ROOT, local_root=LOCAL_ROOT):
@@ -124,26 +181,42 @@ def fetch_remote_file(file, remote_root=REMOTE_ROOT, local_root=LOCAL_ROOT):
     """
     # Construct the url
     url = f"{remote_root}/{file}"
+    local_file = os.path.join(local_root, file)
+
+    # only ask for the file if it changed since we last fetched it
+    etags = _load_etags()
+    headers = {}
+    if os.path.exists(local_file) and url in etags:
+        headers["If-None-Match"] = etags[url]
 
     try:
-        r = requests.get(url)
-        r.raise_for_status()
+        with _SESSION.get(url, headers=headers, stream=True, timeout=30) as r:
+            r.raise_for_status()
+
+            # the local copy is still up to date
+            if r.status_code == 304:
+                return local_file
+
+            # Save the file locally
+            r.raw.decode_content = True
+            write_atomically(
+                local_file, lambda f: shutil.copyfileobj(r.raw, f), binary=True
+            )
 
-        # Save the file locally
-        local_file = os.path.join(local_root, file)
-        with open(local_file, "wb") as f:
-            for chunk in r.iter_content(chunk_size=512):
-                if chunk:
-                    f.write(chunk)
+            # remember the ETag for the next fetch
+            if "ETag" in r.headers:
+                etags[url] = r.headers["ETag"]
+                write_atomically(ETAGS_FILE, lambda f: json.dump(etags, f))
 
         return local_file
 
     except requests.exceptions.HTTPError as err:
-        raise(f"Error fetching {file}: {err}")
+        raise RuntimeError(f"Error fetching {file}: {err}") from err
 
 
+@lru_cache(maxsize=1)
 def fetch_metadata(file="datasets.json"):
-    """Fetch the metadata file from the IBC docs repo
+    """Fetch the metadata file from the IBC docs repo, only once per session
 
     Parameters
     ----------
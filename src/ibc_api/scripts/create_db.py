@@ -2,59 +2,183 @@
  data on EBRAINS."""
 
 # import libraries
-import pandas as pd
+import json
 import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+import numpy as np
+import pandas as pd
+import ibc_api.metadata as md
 import ibc_api.utils as ibc
-from bids.layout import parse_file_entities
 
 datasets = ["raw", "preprocessed", "volume_maps", "surface_maps"]
 
-ibc.authenticate()
-for dataset in datasets:
-    for version in range(1, 4):
-        # Get EBRAINS metadata about the dataset
-        try:
-            ebrains_data = ibc._connect_ebrains(dataset, version=version)
-        except (ValueError, IndexError) as error:
+# root directory and extensions of the files to keep for the maps datasets
+# surface maps and volume maps go in different csv files, and there are some
+# files with .gii extension in the volume maps folder
+maps_files = {
+    "surface_maps": ("resulting_smooth_maps_surface", (".gii", ".json")),
+    "volume_maps": ("resulting_smooth_maps", (".nii.gz", ".json")),
+}
+
+# compile the bids entity patterns from the pybids config only once
+config_file = os.path.join(os.path.dirname(__file__), "ibc_config.json")
+with open(config_file, "r") as f:
+    entities = json.load(f)["entities"]
+entity_patterns = [
+    (entity["name"], re.compile(entity["pattern"]), entity.get("dtype"))
+    for entity in entities
+]
+
+
+def parse_entities(filenames):
+    """Parse bids entities from all the filenames at once
+
+    Parameters
+    ----------
+    filenames : pandas.Series
+        file names as they are on EBRAINS
+
+    Returns
+    -------
+    pandas.DataFrame
+        one column per bids entity, NaN where the entity is absent
+    """
+    # collect the columns first and build the dataframe from them at once
+    columns = {}
+    for name, pattern, dtype in entity_patterns:
+        values = filenames.str.extract(pattern, expand=False)
+        if dtype == "int":
+            values = pd.to_numeric(values)
+        columns[name] = values
+    return pd.DataFrame(columns, index=filenames.index, copy=False)
+
+
+def fetch_file_listing(dataset, version, metadata):
+    """Fetch the names and sizes of all files in a dataset version on EBRAINS
+
+    Parameters
+    ----------
+    dataset : str
+        one of 'raw', 'preprocessed', 'volume_maps', 'surface_maps'
+    version : int
+        version of the dataset, starts from 1
+    metadata : dict
+        metadata of the IBC datasets, as returned by md.fetch_metadata
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        dataframe with columns 'name' and 'bytes', None if the dataset
+        version does not exist
+    """
+    # Get EBRAINS metadata about the dataset
+    try:
+        ebrains_data = ibc._connect_ebrains(
+            dataset, metadata=metadata, version=version
+        )
+    except (ValueError, IndexError):
+        return None
+    # Get the file names and sizes into typed arrays in one pass
+    files = ebrains_data.__dict__["_files"]
+    names = np.empty(len(files), dtype=object)
+    sizes = np.empty(len(files), dtype=np.int64)
+    for i, file in enumerate(files):
+        names[i] = file["name"]
+        sizes[i] = int(file["bytes"])
+    ebrains_df = pd.DataFrame({"name": names, "bytes": sizes})
+    return ebrains_df
+
+
+def build_db(dataset, ebrains_df):
+    """Build the table of bids entities for each file in a dataset
+
+    Parameters
+    ----------
+    dataset : str
+        one of 'raw', 'preprocessed', 'volume_maps', 'surface_maps'
+    ebrains_df : pandas.DataFrame
+        dataframe with columns 'name' and 'bytes' listing the files on EBRAINS
+
+    Returns
+    -------
+    pandas.DataFrame
+        one row per kept file, with its bids entities, size, dataset and
+        path relative to the dataset root directory
+    """
+    # split off the root directory in a single pass over the names
+    name_parts = ebrains_df["name"].str.split("/", n=1)
+    # drop the files we don't keep before parsing them
+    if dataset in maps_files:
+        root, extensions = maps_files[dataset]
+        keep = (name_parts.str[0] == root) & ebrains_df[
+            "name"
+        ].str.endswith(extensions)
+        ebrains_df = ebrains_df[keep].reset_index(drop=True)
+        name_parts = name_parts[keep].reset_index(drop=True)
+    # parse filenames to get all the bids entities
+    bids_df = parse_entities(ebrains_df["name"])
+    # remove rows with empty path
+    bids_df = bids_df.dropna(how="all")
+    # add a column with the file sizes in MB
+    bids_df["megabytes"] = ebrains_df["bytes"].div(1024**2).astype(np.float32)
+    # add a column with the dataset name
+    bids_df["dataset"] = pd.Series(
+        dataset, index=bids_df.index, dtype="category"
+    )
+    # add a column with the file path without the root directory
+    bids_df["path"] = name_parts.str[1]
+    bids_df = bids_df.reset_index(drop=True)
+    # bids entities only take a handful of distinct values
+    categorical = ["subject", "session", "task", "extension"]
+    bids_df[categorical] = bids_df[categorical].astype("category")
+    return bids_df
+
+
+def build_one(dataset, version, metadata):
+    """Fetch the file listing of a dataset version and build its database
+
+    Parameters
+    ----------
+    dataset : str
+        one of 'raw', 'preprocessed', 'volume_maps', 'surface_maps'
+    version : int
+        version of the dataset, starts from 1
+    metadata : dict
+        metadata of the IBC datasets, as returned by md.fetch_metadata
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        database of the dataset version, None if it does not exist
+    """
+    ebrains_df = fetch_file_listing(dataset, version, metadata)
+    if ebrains_df is None:
+        return None
+    return build_db(dataset, ebrains_df)
+
+
+# fetch the metadata once here, rather than from every thread at once
+metadata = md.fetch_metadata()
+# connect once before starting the threads, so that an invalid token is
+# replaced here rather than from every thread at once
+ibc._connect_ebrains(datasets[0], metadata=metadata)
+# the dataset versions are independent, so fetch and build them in threads
+with ThreadPoolExecutor(max_workers=8) as executor:
+    builds = {
+        (dataset, version): executor.submit(
+            build_one, dataset, version, metadata
+        )
+        for dataset, version in product(datasets, range(1, 4))
+    }
+    for (dataset, version), build in builds.items():
+        bids_df = build.result()
+        if bids_df is None:
             print(f"skipping dataset {dataset}, version {version}")
             continue
-        # Get the file names and other info as dataframes
-        ebrains_df = pd.DataFrame(ebrains_data.__dict__["_files"])
-        filenames = ebrains_df["name"].tolist()
-        # parse filenames using pybids to get all the entities
-        bids_entities = []
-        for file in filenames:
-            bids_entity = parse_file_entities(
-                file, include_unmatched=True, config="ibc_conifg.json"
-            )
-            bids_entities.append(bids_entity)
-        # convert the list of dictionaries with bids entities to a dataframe
-        bids_df = pd.DataFrame(bids_entities)
-        # remove rows with empty path
-        bids_df = bids_df.dropna(how="all")
-        # add a column with the file sizes in MB
-        bids_df["megabytes"] = ebrains_df["bytes"].astype(int).div(1024**2)
-        # add a column with the dataset name
-        bids_df["dataset"] = [dataset] * len(bids_df)
-        root_dir = ebrains_df["name"].str.split("/").str[0]
-        # add a column with the file path without the root directory
-        path = ebrains_df["name"].str.split("/").str[1:].str.join("/")
-        bids_df["path"] = path
-        # separate surface maps and volume maps in different csv files
-        if dataset == "surface_maps":
-            mask = (root_dir == "resulting_smooth_maps_surface") & bids_df[
-                "extension"
-            ].isin([".gii", ".json"])
-            bids_df = bids_df[mask]
-        # there are some files with .gii extension in the volume maps folder
-        # filtering them out
-        elif dataset == "volume_maps":
-            mask = (root_dir == "resulting_smooth_maps") & bids_df[
-                "extension"
-            ].isin([".nii.gz", ".json"])
-            bids_df = bids_df[mask]
-        bids_df = bids_df.reset_index(drop=True)
         # create a csv file with the bids entities
         csv_file = os.path.join("..", "data", f"{dataset}_v{version}.csv")
-        bids_df.to_csv(csv_file)
+        bids_df.to_csv(csv_file, index=False, chunksize=100_000)
         print(f"{csv_file} created!")
@@ -2,26 +2,26 @@
 """
 
 # %$
+import csv
 import json
 import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
 
 import nibabel
 import pandas as pd
+import requests
 import siibra
-from joblib import Memory, Parallel, delayed
 from siibra.retrieval.cache import CACHE
 from siibra.retrieval.repositories import EbrainsHdgConnector
 from siibra.retrieval.requests import EbrainsRequest, SiibraHttpRequestError
+from tqdm import tqdm
 
 from . import metadata as md
 
-# clear cache
-CACHE.clear()
-
-# dataset ids on ebrains
-METADATA = md.fetch_metadata()
-
 # all subjects in IBC dataset
 SUBJECTS = md.SUBJECTS
 
@@ -29,10 +29,37 @@ SUBJECTS = md.SUBJECTS
 TOKEN_ROOT = os.path.join(os.path.dirname(__file__), "data")
 os.makedirs(TOKEN_ROOT, exist_ok=True)
 
-# memory cache
-joblib_cache_dir = os.path.join(os.path.dirname(__file__), "cache")
-os.makedirs(joblib_cache_dir, exist_ok=True)
-memory = Memory(joblib_cache_dir, verbose=0)
+# token already set in siibra in this session, to read the token file once
+_TOKEN_CACHE = {"value": None}
+
+# files saved exactly as they are served by ebrains, without decoding them
+RAW_EXTENSIONS = (
+    ".nii.gz",
+    ".nii",
+    ".gii",
+    ".bvec",
+    ".bval",
+    ".tsv",
+    ".csv",
+    ".json",
+)
+
+# number of downloads between siibra cache maintenance runs
+CACHE_MAINTENANCE_INTERVAL = 64
+
+# number of downloads recorded in the local database at a time
+LEDGER_FLUSH_INTERVAL = 256
+
+# attempts at fetching a file from ebrains, and longest wait between them
+DOWNLOAD_ATTEMPTS = 5
+MAX_RETRY_WAIT = 30
+
+
+def __getattr__(name):
+    # dataset ids on ebrains, only fetched once they are first needed
+    if name == "METADATA":
+        return md.fetch_metadata()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _authenticate(token_dir=TOKEN_ROOT):
@@ -44,26 +71,56 @@ def _authenticate(token_dir=TOKEN_ROOT):
     would prompt you to login again.
     """
 
-    # read the token file
     token_file = os.path.join(token_dir, "token")
+    # the token is already set for this session
+    if _TOKEN_CACHE["value"] is not None:
+        return token_file
+
+    # read the token file
     if os.path.exists(token_file):
         with open(token_file, "r") as f:
             token = f.read()
-            # set the token
-            siibra.set_ebrains_token(token)
+        # set the token
+        siibra.set_ebrains_token(token)
     else:
         siibra.fetch_ebrains_token()
         token = EbrainsRequest._KG_API_TOKEN
         # save the token
         with open(token_file, "w") as f:
             f.write(token)
-
-    f.close()
+    _TOKEN_CACHE["value"] = token
 
     return token_file
 
 
-def _connect_ebrains(data_type="volume_maps", metadata=METADATA, version=None):
+@lru_cache(maxsize=1)
+def _get_connector(dataset_id):
+    """Connect to a dataset on EBRAINS, reusing the last connector if it is for
+    the same dataset.
+
+    Parameters
+    ----------
+    dataset_id : str
+        id of the dataset on EBRAINS
+
+    Returns
+    -------
+    EbrainsHdgConnector
+        connector to the dataset
+    """
+    return EbrainsHdgConnector(dataset_id)
+
+
+def _forget_connection():
+    """Forget the token and connector cached in this session, so that the next
+    connection to EBRAINS checks the token again and fetches a new one if it
+    expired.
+    """
+    _TOKEN_CACHE["value"] = None
+    _get_connector.cache_clear()
+
+
+def _connect_ebrains(data_type="volume_maps", metadata=None, version=None):
     """Connect to given IBC dataset on EBRAINS via Human Data Gateway.
 
     Parameters
@@ -74,7 +131,7 @@ def _connect_ebrains(data_type="volume_maps", metadata=METADATA, version=None):
 
     metadata : dict, optional
         dictionary object containing version info, dataset ids etc, by default
-        METADATA
+        None, in which case it is fetched from the IBC api repo
 
     version : int, optional
         version of the dataset to select, starts from 1, by default None
@@ -92,15 +149,20 @@ def _connect_ebrains(data_type="volume_maps", metadata=METADATA, version=None):
     token_file = _authenticate()
 
     try:
-        return EbrainsHdgConnector(dataset_id)
+        return _get_connector(dataset_id)
     except AttributeError:
         raise ValueError(
             f"Unable to fetch dataset {data_type}, version {version} from EBRAINS."
         )
     except SiibraHttpRequestError:
         print("Saved token is invalid. Fetching a new token.")
-        # delete the token file
-        os.remove(token_file)
+        # forget the token and delete the token file
+        _forget_connection()
+        try:
+            os.remove(token_file)
+        except FileNotFoundError:
+            # another thread already removed it
+            pass
         # try connecting again
         return _connect_ebrains(data_type, metadata, version)
 
@@ -151,21 +213,19 @@ def download_gm_mask(resolution=1.5, save_to=None):
     else:
         mask = "gm_mask_3mm.nii.gz"
 
-    remote_file = "https://api.github.com/repos/individual-brain-charting/public_analysis_code/contents/ibc_data"
-    remote_file = os.path.join(remote_file, mask)
-    # save the database file
+    remote_root = "https://api.github.com/repos/individual-brain-charting/public_analysis_code/contents/ibc_data"
+    # save the mask file
     save_to = _create_root_dir(save_to)
-    save_as = os.path.join(save_to, mask)
 
-    # use curl with github api to download the file
-    os.system(
-        f"curl -s -S -L -H 'Accept: application/vnd.github.v4.raw' -H 'X-GitHub-Api-Version: 2022-11-28' {remote_file} -o '{save_as}'"
+    # download the raw file from the github api, streaming it to disk
+    save_as = md.fetch_remote_file(
+        mask, remote_root=remote_root, local_root=save_to
     )
 
     return save_as
 
 
-def get_info(data_type="volume_maps", save_to=None, metadata=METADATA):
+def get_info(data_type="volume_maps", save_to=None, metadata=None):
     """Fetch a csv file describing each file in a given IBC dataset on EBRAINS.
 
     Parameters
@@ -185,15 +245,34 @@ def get_info(data_type="volume_maps", save_to=None, metadata=METADATA):
     # file with all information about the dataset
     db_file = md.fetch_dataset_db(data_type, metadata)
     # load the file as dataframe
-    # convert subject, session and run to string to avoid losing leading zeros
+    # read subject, session and run as strings to avoid losing leading zeros
+    # the columns filtered on only take a few values, so store them as
+    # categories, whose categories are parsed as strings too
     db = pd.read_csv(
-        db_file, converters={"subject": str, "session": str, "run": str}
+        db_file,
+        dtype={
+            "subject": "category",
+            "session": "category",
+            "run": str,
+            "task": "category",
+            "dataset": "category",
+        },
     )
+    # drop the index column written by older versions of create_db.py
     db.drop(columns=["Unnamed: 0"], inplace=True, errors="ignore")
     # save the database file
     save_to = _create_root_dir(save_to)
     save_as = os.path.join(save_to, f"available_{data_type}.csv")
-    db.to_csv(save_as)
+    # the saved copy is stamped with the modification time of the database
+    # file it was made from, only rewrite it if it was made from another
+    # file, e.g. another version of the dataset, or an older copy of it
+    db_mtime = os.stat(db_file).st_mtime_ns
+    if (
+        not os.path.exists(save_as)
+        or os.stat(save_as).st_mtime_ns != db_mtime
+    ):
+        db.to_csv(save_as)
+        os.utime(save_as, ns=(time.time_ns(), db_mtime))
     return db
 
 
@@ -216,11 +295,11 @@ def filter_data(db, subject_list=SUBJECTS, task_list=False):
         dataframe with information about files corresponding to only include
         given subjects and tasks
     """
-    # filter the database on subject
-    filtered_db = db[db["subject"].isin(subject_list)]
-    # filter the database on task if specified
+    # build one mask on subject, and task if specified, to index db only once
+    mask = db["subject"].isin(subject_list)
     if task_list:
-        filtered_db = filtered_db[filtered_db["task"].isin(task_list)]
+        mask &= db["task"].isin(task_list)
+    filtered_db = db[mask]
     length = len(filtered_db)
     if length == 0:
         raise ValueError(
@@ -233,7 +312,7 @@ def filter_data(db, subject_list=SUBJECTS, task_list=False):
     return filtered_db
 
 
-def get_file_paths(db, metadata=METADATA, save_to_dir=None):
+def get_file_paths(db, metadata=None, save_to_dir=None):
     """Get the remote and local file paths for each file in a (filtered) dataframe.
 
     Parameters
@@ -249,37 +328,35 @@ def get_file_paths(db, metadata=METADATA, save_to_dir=None):
         is the remote file paths and second list is the local file paths
     """
     # get the data type from the db
-    data_type = db["dataset"].unique()
+    data_type = db["dataset"].iat[0]
     # only fetching one data type at a time for now
-    assert len(data_type) == 1
-    data_type = data_type[0]
+    assert (db["dataset"] == data_type).all()
     # get the file names
     file_names = db["path"].tolist()
     # update file names to be relative to the dataset
-    remote_file_names = []
-    local_file_names = []
     remote_root_dir = md.select_dataset(data_type, metadata)["root"]
     if save_to_dir == None:
         local_root_dir = data_type
     else:
         local_root_dir = os.path.join(save_to_dir, data_type)
-    for file in file_names:
-        # put the file path together
-        # always use "/" as the separator for remote file paths
-        remote_file = remote_root_dir + "/" + file
-        # but separator on local machine could be different
-        # get all parts of the file path
-        all_file_parts = file.split("/")
-        # put the file path together using the local separator
-        local_file = os.path.join(local_root_dir, *all_file_parts)
-        remote_file_names.append(remote_file)
-        local_file_names.append(local_file)
+    # always use "/" as the separator for remote file paths
+    remote_prefix = remote_root_dir.rstrip("/") + "/"
+    remote_file_names = [remote_prefix + file.lstrip("/") for file in file_names]
+    # but separator on local machine could be different
+    local_prefix = local_root_dir + os.sep
+    if os.sep == "/":
+        local_file_names = [local_prefix + file for file in file_names]
+    else:
+        local_file_names = [
+            local_prefix + file.replace("/", os.sep) for file in file_names
+        ]
 
     return remote_file_names, local_file_names
 
 
 def _update_local_db(db_file, files_data):
-    """Update the local database of downloaded files.
+    """Append newly downloaded files to the local database of downloaded
+    files, without reading back the files downloaded before.
 
     Parameters
     ----------
@@ -291,33 +368,119 @@ def _update_local_db(db_file, files_data):
     Returns
     -------
     pandas.DataFrame
-        updated local database
+        rows added to the local database
+    """
+    columns = ["local_path", "downloaded_on"]
+    # only write the header when starting a new (or empty) database
+    write_header = (
+        not os.path.exists(db_file) or os.path.getsize(db_file) == 0
+    )
+    with open(db_file, "a", newline="") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(columns)
+        writer.writerows(files_data)
+
+    return pd.DataFrame(files_data, columns=columns)
+
+
+def _write_nifti(file, data):
+    """Write a nifti image to a file.
+
+    Parameters
+    ----------
+    file : str
+        path to the .nii or .nii.gz file to write to
+    data : nibabel.nifti1.Nifti1Image
+        image to write
+    """
+    nibabel.save(data, file)
+
+
+def _write_gifti(file, data):
+    """Write a gifti image to a file.
+
+    Parameters
+    ----------
+    file : str
+        path to the .gii file to write to
+    data : nibabel.gifti.gifti.GiftiImage
+        image to write
     """
-    if not os.path.exists(db_file):
-        # create a new database
-        db = pd.DataFrame(columns=["local_path", "downloaded_on"])
+    nibabel.save(data, file, mode="compat")
+
+
+def _write_dataframe(file, data):
+    """Write a dataframe to a .csv or .tsv file.
+
+    Parameters
+    ----------
+    file : str
+        path to the .csv or .tsv file to write to
+    data : pandas.DataFrame
+        dataframe to write, without its index
+
+    Raises
+    ------
+    ValueError
+        if the file is neither a .csv nor a .tsv file
+    """
+    if file.endswith(".csv"):
+        data.to_csv(file, index=False)
+    elif file.endswith(".tsv"):
+        data.to_csv(file, index=False, sep="\t")
     else:
-        try:
-            # load the database
-            db = pd.read_csv(db_file, index_col=False)
-        except (
-            pd.errors.EmptyDataError,
-            pd.errors.ParserError,
-            FileNotFoundError,
-        ):
-            print("Empty database file. Creating a new one.")
-            db = pd.DataFrame(columns=["local_path", "downloaded_on"])
+        raise ValueError(
+            f"File type not supported for {file}. Only .csv and .tsv are supported."
+        )
 
-    downloaded_db = pd.DataFrame(
-        files_data, columns=["local_path", "downloaded_on"]
-    )
 
-    new_db = pd.concat([db, downloaded_db], ignore_index=True)
-    new_db.reset_index(drop=True, inplace=True)
-    # save the database
-    new_db.to_csv(db_file, index=False)
+def _write_json(file, data):
+    """Write a dictionary to a json file.
 
-    return db
+    Parameters
+    ----------
+    file : str
+        path to the .json file to write to
+    data : dict
+        dictionary to write
+    """
+    with open(file, "w") as f:
+        json.dump(data, f)
+
+
+def _write_bytes(file, data):
+    """Write raw bytes to a file, for the formats saved as they are served.
+
+    Parameters
+    ----------
+    file : str
+        path to the file to write to
+    data : bytes
+        file contents as served by ebrains
+
+    Raises
+    ------
+    ValueError
+        if the file is not one of the RAW_EXTENSIONS
+    """
+    if not file.endswith(RAW_EXTENSIONS):
+        raise ValueError(
+            f"Don't know how to save file {file} of type {type(data)}"
+        )
+    # write to a temporary file next to the destination and move it
+    # in place, so an interrupted download never leaves a partial file
+    md.write_atomically(file, lambda f: f.write(data), binary=True)
+
+
+# how to write each type of data fetched from ebrains
+_WRITERS = {
+    nibabel.nifti1.Nifti1Image: _write_nifti,
+    nibabel.gifti.gifti.GiftiImage: _write_gifti,
+    pd.DataFrame: _write_dataframe,
+    dict: _write_json,
+    bytes: _write_bytes,
+}
 
 
 def _write_file(file, data):
@@ -335,41 +498,68 @@ def _write_file(file, data):
     file: str
         path to the written
     """
-    # check file type and write accordingly
-    if type(data) == nibabel.nifti1.Nifti1Image:
-        nibabel.save(data, file)
-    elif type(data) == nibabel.gifti.gifti.GiftiImage:
-        nibabel.save(data, file, mode="compat")
-    elif type(data) == pd.core.frame.DataFrame:
-        if file.endswith(".csv"):
-            data.to_csv(file, index=False)
-        elif file.endswith(".tsv"):
-            data.to_csv(file, index=False, sep="\t")
-        else:
-            raise ValueError(
-                f"File type not supported for {file}. Only .csv and .tsv are supported."
-            )
-    elif type(data) == dict:
-        with open(file, "w") as f:
-            json.dump(data, f)
-    elif type(data) == bytes:
-        if file.endswith(".bvec") or file.endswith(".bval"):
-            with open(file, "wb") as f:
-                f.write(data)
-            f.close()
+    # look up the writer for the type of data, falling back to subclasses
+    writer = _WRITERS.get(type(data))
+    if writer is None:
+        for data_type, data_writer in _WRITERS.items():
+            if isinstance(data, data_type):
+                writer = data_writer
+                break
         else:
             raise ValueError(
                 f"Don't know how to save file {file} of type {type(data)}"
             )
-    else:
-        raise ValueError(
-            f"Don't know how to save file {file} of type {type(data)}"
-        )
+    writer(file, data)
 
     return file
 
 
-@memory.cache
+def _get_with_retries(src_file, connector, decode_func=None):
+    """Fetch a file from ebrains, retrying with exponential backoff on
+    transient errors.
+
+    Parameters
+    ----------
+    src_file : str
+        path to the file on ebrains
+    connector : EbrainsHdgConnector
+        connector to the IBC dataset on ebrains
+    decode_func : callable or None, optional
+        function to decode the fetched bytes, by default None, in which case
+        siibra decodes the file based on its extension
+
+    Returns
+    -------
+    data fetched from ebrains
+        the (decoded) file
+    """
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        try:
+            return connector.get(src_file, decode_func=decode_func)
+        except SiibraHttpRequestError as e:
+            # a missing file or an expired token won't fix itself, only
+            # retry on server errors and rate limiting
+            status_code = getattr(e, "status_code", None)
+            if status_code == 401:
+                # the token expired, connect again on the next download
+                # instead of reusing the cached connector
+                _forget_connection()
+            is_transient = status_code is not None and (
+                status_code >= 500 or status_code == 429
+            )
+            if not is_transient or attempt == DOWNLOAD_ATTEMPTS - 1:
+                raise
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+        ):
+            if attempt == DOWNLOAD_ATTEMPTS - 1:
+                raise
+        # wait longer after each failure, with jitter so the parallel
+        # downloads don't all retry at once
+        time.sleep(min(MAX_RETRY_WAIT, 2**attempt) + random.random())
+
+
 def _download_file(src_file, dst_file, connector):
     """Download a file from ebrains.
 
@@ -387,19 +577,18 @@ def _download_file(src_file, dst_file, connector):
     str, datetime
         path to the downloaded file and time at which it was downloaded
     """
-    # CACHE.run_maintenance()
-    if not os.path.exists(dst_file):
-        # load the file from ebrains
-        src_data = connector.get(src_file)
-        # make sure the directory exists
-        dst_file_dir = os.path.split(dst_file)[0]
-        os.makedirs(dst_file_dir, exist_ok=True)
-        # save the file locally
-        dst_file = _write_file(dst_file, src_data)
-        return dst_file
+    # files already on disk are skipped by download_data before getting here
+    # load the file from ebrains, known formats as raw bytes to skip
+    # decoding them only to encode them again when saving
+    if dst_file.endswith(RAW_EXTENSIONS):
+        src_data = _get_with_retries(
+            src_file, connector, decode_func=lambda b: b
+        )
     else:
-        print(f"File {dst_file} already exists, skipping download.")
-        return dst_file
+        src_data = _get_with_retries(src_file, connector)
+    # save the file locally, download_data already created the directory
+    dst_file = _write_file(dst_file, src_data)
+    return dst_file
 
 
 def download_data(db, n_jobs=2, save_to=None):
@@ -411,8 +600,8 @@ def download_data(db, n_jobs=2, save_to=None):
         dataframe with information about files in the dataset, ideally a subset
         of the full dataset
     n_jobs : int, optional
-        number of parallel jobs to run, by default 2. -1 would use all the CPUs. 
-        See: https://joblib.readthedocs.io/en/latest/generated/joblib.Parallel.html
+        number of parallel download threads, by default 2. -1 would use as
+        many threads as CPUs, -2 one less, and so on.
     save_to : str, optional
         where to save the data, by default None, in which case the data is
         saved in a directory called "ibc_data" in the current working directory
@@ -438,10 +627,7 @@ def download_data(db, n_jobs=2, save_to=None):
         )
 
     # get data type from db
-    data_type = db["dataset"].unique()[0]
-    # connect to ebrains dataset
-    print("... Fetching token and connecting to EBRAINS ...")
-    connector = _connect_ebrains(data_type)
+    data_type = db["dataset"].iat[0]
     # set the save directory
     save_to = _create_root_dir(save_to)
     # file to track downloaded file names and times
@@ -449,35 +635,130 @@ def download_data(db, n_jobs=2, save_to=None):
     # get the file names as they are on ebrains
     src_file_names, dst_file_names = get_file_paths(db, save_to_dir=save_to)
 
+    # skip files that were already downloaded, listing each destination
+    # directory once instead of checking each file separately
+    existing_files = set()
+    for dst_file_dir in {os.path.dirname(dst) for dst in dst_file_names}:
+        if os.path.isdir(dst_file_dir):
+            with os.scandir(dst_file_dir) as entries:
+                existing_files.update(
+                    entry.path for entry in entries if entry.is_file()
+                )
+    to_download = [
+        (src_file, dst_file)
+        for src_file, dst_file in zip(src_file_names, dst_file_names)
+        if dst_file not in existing_files
+    ]
+    n_skipped = len(dst_file_names) - len(to_download)
+    if n_skipped:
+        print(f"Skipping {n_skipped} files that are already downloaded.")
+    if not to_download:
+        print(f"All requested files are already in {save_to}.")
+        return pd.DataFrame(columns=["local_path", "downloaded_on"])
+
+    # create each destination directory once, rather than once per file
+    for dst_file_dir in {os.path.dirname(dst) for _, dst in to_download}:
+        os.makedirs(dst_file_dir, exist_ok=True)
+
+    # connect to ebrains dataset
+    print("... Fetching token and connecting to EBRAINS ...")
+    connector = _connect_ebrains(data_type)
+
     # helper to process the parallel download
     def _download_and_update_progress(src_file, dst_file, connector):
         try:
             file_name = _download_file(src_file, dst_file, connector)
             file_time = datetime.now()
-            CACHE.run_maintenance()  # keep cache < 2GB
             return file_name, file_time
         except Exception as e:
-            raise(f"Error downloading {src_file}. Error: {e}")
+            raise RuntimeError(
+                f"Error downloading {src_file}. Error: {e}"
+            ) from e
+
+    # negative n_jobs count back from the number of CPUs
+    if n_jobs < 0:
+        n_jobs = max(1, os.cpu_count() + 1 + n_jobs)
 
     # download finally
-    print(f"\n...Starting download of {len(src_file_names)} files...")
-    results = Parallel(n_jobs=n_jobs, backend="threading", verbose=10)(
-        delayed(_download_and_update_progress)(src_file, dst_file, connector)
-        for src_file, dst_file in zip(src_file_names, dst_file_names)
-    )
+    # downloads are I/O bound, so threads keep n_jobs requests in flight
+    print(f"\n...Starting download of {len(to_download)} files...")
+    results = []
+    # downloaded files not yet recorded in the local database
+    pending = []
+    futures = []
+    # futures whose result was already collected
+    collected = set()
+    try:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [
+                executor.submit(
+                    _download_and_update_progress,
+                    src_file,
+                    dst_file,
+                    connector,
+                )
+                for src_file, dst_file in to_download
+            ]
+            # first failed download, raised once the running ones finish
+            error = None
+            try:
+                for future in tqdm(
+                    as_completed(futures), total=len(futures)
+                ):
+                    collected.add(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        # don't start the queued downloads, but keep
+                        # recording the ones already running so the ledger
+                        # matches the disk
+                        if error is None:
+                            error = e
+                            for queued in futures:
+                                queued.cancel()
+                        continue
+                    results.append(result)
+                    pending.append(result)
+                    # update the local database in batches as files come in
+                    if len(pending) == LEDGER_FLUSH_INTERVAL:
+                        _update_local_db(local_db_file, pending)
+                        pending = []
+                    # keep cache < 2GB, from this thread only and every few
+                    # downloads since it scans the whole siibra cache
+                    if len(results) % CACHE_MAINTENANCE_INTERVAL == 0:
+                        CACHE.run_maintenance()
+            except BaseException:
+                # on interruption too (e.g. ctrl-c), the executor would
+                # otherwise run every queued download before exiting
+                for queued in futures:
+                    queued.cancel()
+                raise
+            if error is not None:
+                raise error
+    finally:
+        # downloads that were running when the loop was interrupted have
+        # finished by now, record them along with the remaining files
+        for future in futures:
+            if (
+                future not in collected
+                and future.done()
+                and not future.cancelled()
+                and future.exception() is None
+            ):
+                pending.append(future.result())
+        if pending:
+            _update_local_db(local_db_file, pending)
+        # clean up the cache
+        CACHE.clear()
 
-    # update the local database
-    results = [res for res in results if res[0] is not None]
-    if len(results) == 0:
-        raise RuntimeError(f"No files downloaded ! Please try again.")
-    download_details = _update_local_db(local_db_file, results)
     print(
         f"Downloaded requested files from IBC {data_type} dataset. See "
         f"{local_db_file} for details.\n"
     )
-
-    # clean up the cache
-    CACHE.clear()
-    memory.clear()
+    download_details = pd.DataFrame(
+        results, columns=["local_path", "downloaded_on"]
+    )
 
     return download_details